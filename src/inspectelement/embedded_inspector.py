@@ -8,6 +8,16 @@ from .models import ElementSummary, LocatorCandidate
 from .scoring import score_candidates
 from .table_root_detection import detect_table_root_candidates
 
+_DYNAMIC_CLASS_RE = re.compile(
+    r"^css-[a-z0-9_-]{4,}$"
+    r"|^jss\d+$"
+    r"|^sc-[a-z0-9]+$"
+    r"|^[a-f0-9]{8,}$"
+    r"|^[a-z]+__[a-z]+___[a-z0-9]{5,}$"
+    r"|^_?[a-z]{1,3}[0-9a-f]{6,}$",
+    re.IGNORECASE,
+)
+
 EMBEDDED_INSPECTOR_BOOTSTRAP_SCRIPT = r"""
 (() => {
   function escapeCssString(value) {
@@ -551,13 +561,11 @@ EMBEDDED_INSPECTOR_BOOTSTRAP_SCRIPT = r"""
 def build_element_summary_from_payload(summary_payload: dict[str, Any]) -> ElementSummary:
     tag = str(summary_payload.get("tag") or "unknown").strip().lower() or "unknown"
     raw_ancestry = summary_payload.get("ancestry")
-    ancestry: list[dict[str, str]] = []
-    if isinstance(raw_ancestry, list):
-        for item in raw_ancestry:
-            if not isinstance(item, dict):
-                continue
-            normalized = {str(key): str(value) for key, value in item.items() if value is not None}
-            ancestry.append(normalized)
+    ancestry: list[dict[str, str]] = [
+        {str(key): str(value) for key, value in item.items() if value is not None}
+        for item in (raw_ancestry if isinstance(raw_ancestry, list) else [])
+        if isinstance(item, dict)
+    ]
 
     table_root_candidates = detect_table_root_candidates(ancestry)
     table_root = None
@@ -802,7 +810,7 @@ def _as_optional_text(value: Any) -> str | None:
 
 
 def _normalize_space(value: str) -> str:
-    return re.sub(r"\s+", " ", value).strip()
+    return " ".join(value.split())
 
 
 def _xpath_literal(value: str) -> str:
@@ -837,12 +845,4 @@ def _looks_dynamic_class(value: str) -> bool:
     token = value.strip()
     if not token:
         return True
-    patterns = (
-        r"^css-[a-z0-9_-]{4,}$",
-        r"^jss\d+$",
-        r"^sc-[a-z0-9]+$",
-        r"^[a-f0-9]{8,}$",
-        r"^[a-z]+__[a-z]+___[a-z0-9]{5,}$",
-        r"^_?[a-z]{1,3}[0-9a-f]{6,}$",
-    )
-    return any(re.match(pattern, token, flags=re.IGNORECASE) for pattern in patterns)
+    return _DYNAMIC_CLASS_RE.match(token) is not None
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Any, Iterable, Mapping, Sequence
 
 from playwright.sync_api import ElementHandle, Page
@@ -11,6 +14,7 @@ from .scoring import score_candidates
 from .selector_rules import (
     AttributeStability,
     ROOT_ID_BLOCKLIST_LOWER,
+    TEST_ATTR_PRIORITY,
     analyze_attribute_stability,
     build_strategy_key,
     is_blocked_root_id,
@@ -20,12 +24,21 @@ from .selector_rules import (
     is_stable_attribute_value,
     normalize_space,
 )
-from .validation import count_locator_matches, validate_locator_candidate
+from .validation import count_locator_matches, count_locator_matches_batch, validate_locator_candidate
 
-_DYNAMIC_ID_TOKEN_PATTERNS = (
-    re.compile(r"^jdt_\d+$", re.IGNORECASE),
-    re.compile(r"^j_idt\d+$", re.IGNORECASE),
-    re.compile(r"^\d+$"),
+# JSF/PrimeFaces generated id segments: "jdt_12", "j_idt34" or a bare row index.
+_DYNAMIC_ID_TOKEN_RE = re.compile(r"(?:jdt_|j_idt)?\d+", re.IGNORECASE)
+_JSF_INDEX_SEGMENT_RE = re.compile(r":\d+:")
+_CSS_SAFE_ID_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_-]*$")
+
+_ANCESTOR_ANCHOR_ATTRS = (
+    "data-testid",
+    "data-test",
+    "data-qa",
+    "data-cy",
+    "data-e2e",
+    "aria-label",
+    "name",
 )
 
 PROMOTABLE_STABLE_ATTRS = (
@@ -39,6 +52,145 @@ PROMOTABLE_STABLE_ATTRS = (
     "aria-label",
 )
 
+_CLICKABLE_ANCESTOR_SCRIPT = (
+    """
+    (el) => {
+      const attrs = %s;
+      let current = el;
+      while (current && current.nodeType === Node.ELEMENT_NODE) {
+        const tag = current.tagName.toLowerCase();
+        const role = (current.getAttribute('role') || '').toLowerCase();
+        const inputType = (current.getAttribute('type') || '').toLowerCase();
+        const clickableInput = tag === 'input' && ['button', 'submit', 'reset'].includes(inputType);
+        const clickableRole = ['button', 'tab', 'link'].includes(role);
+        const clickable = tag === 'a' || tag === 'button' || clickableInput || clickableRole;
+        if (clickable) {
+          const found = {};
+          for (const attr of attrs) {
+            const value = current.getAttribute(attr);
+            if (value) {
+              found[attr] = value;
+            }
+          }
+          return { tag, role, inputType, attrs: found };
+        }
+        current = current.parentElement;
+      }
+      return null;
+    }
+    """
+    % json.dumps(list(PROMOTABLE_STABLE_ATTRS))
+)
+
+# One round-trip for everything the factory reads from the element itself.
+_ELEMENT_CONTEXT_SCRIPT = (
+    """
+    (el) => {
+      const attrs = %s;
+      let ancestor = null;
+      let current = el.parentElement;
+      let hops = 0;
+      while (current && hops < 2 && !ancestor) {
+        const tag = (current.tagName || '').toLowerCase();
+        if (tag && tag !== 'html' && tag !== 'body') {
+          for (const attr of attrs) {
+            const value = current.getAttribute(attr);
+            if (value) {
+              ancestor = { tag, attr, value };
+              break;
+            }
+          }
+        }
+        current = current.parentElement;
+        hops += 1;
+      }
+
+      const parts = [];
+      current = el;
+      while (current && current.nodeType === Node.ELEMENT_NODE && parts.length < 6) {
+        const tag = current.tagName.toLowerCase();
+        if (current.id) {
+          parts.unshift(`#${CSS.escape(current.id)}`);
+          break;
+        }
+        let nth = 1;
+        let sibling = current;
+        while ((sibling = sibling.previousElementSibling)) {
+          if (sibling.tagName.toLowerCase() === tag) {
+            nth += 1;
+          }
+        }
+        parts.unshift(`${tag}:nth-of-type(${nth})`);
+        current = current.parentElement;
+      }
+
+      const clickable = (%s)(el);
+      return { ancestor, fallback: parts.join(' > '), clickable };
+    }
+    """
+    % (json.dumps(list(_ANCESTOR_ANCHOR_ATTRS)), _CLICKABLE_ANCESTOR_SCRIPT.strip())
+)
+_EMPTY_ELEMENT_CONTEXT: dict[str, Any] = {"ancestor": None, "fallback": "", "clickable": None}
+# The context helper is installed on the frame's window on first use so later calls only ship a
+# short stub. The stub only trusts a helper that carries this build's version; after a navigation,
+# or when the page replaced the global, it returns null and the caller reinstalls the helper.
+_ELEMENT_CONTEXT_HELPER = "window.__inspectelementElementContext"
+_ELEMENT_CONTEXT_VERSION = hashlib.sha1(_ELEMENT_CONTEXT_SCRIPT.encode("utf-8")).hexdigest()[:12]
+_INSTALL_ELEMENT_CONTEXT_SCRIPT = (
+    f"(el) => ({_ELEMENT_CONTEXT_HELPER} = Object.assign({_ELEMENT_CONTEXT_SCRIPT.strip()}, "
+    f"{{ version: '{_ELEMENT_CONTEXT_VERSION}' }}))(el)"
+)
+_CACHED_ELEMENT_CONTEXT_SCRIPT = (
+    f"(el) => typeof {_ELEMENT_CONTEXT_HELPER} === 'function'"
+    f" && {_ELEMENT_CONTEXT_HELPER}.version === '{_ELEMENT_CONTEXT_VERSION}'"
+    f" ? {_ELEMENT_CONTEXT_HELPER}(el) : null"
+)
+
+_DOM_SNAPSHOT_SCRIPT = """
+() => {
+  const nodes = Array.from(document.querySelectorAll('*'));
+  const tagHistogram = {};
+  const attrHistogram = {};
+  let textNodeCount = 0;
+
+  for (const node of nodes) {
+    const tag = (node.tagName || '').toLowerCase();
+    if (tag) {
+      tagHistogram[tag] = (tagHistogram[tag] || 0) + 1;
+    }
+    for (const attr of Array.from(node.attributes || [])) {
+      attrHistogram[attr.name] = (attrHistogram[attr.name] || 0) + 1;
+    }
+    const text = (node.innerText || node.textContent || '').trim();
+    if (text) {
+      textNodeCount += 1;
+    }
+  }
+
+  return {
+    node_count: nodes.length,
+    text_node_count: textNodeCount,
+    title: document.title || '',
+    url: location.href || '',
+    tag_histogram: tagHistogram,
+    attr_histogram: attrHistogram,
+  };
+}
+"""
+
+_TEST_ATTRS = frozenset(TEST_ATTR_PRIORITY)
+_FORM_FIELD_TAGS = frozenset({"input", "textarea", "select"})
+_ROOT_TAGS = frozenset({"html", "body"})
+_TEXT_CLICK_TAGS = frozenset({"button", "a", "span"})
+_CLICKABLE_TAGS = frozenset({"a", "button"})
+_CLICKABLE_ROLES = frozenset({"button", "tab", "link"})
+_CLICKABLE_INPUT_TYPES = frozenset({"button", "submit", "reset"})
+_CSS_QUOTES = frozenset({"'", '"'})
+_CSS_COMBINATORS = frozenset({">", "+", "~", ","})
+
+# Rules whose selectors are unique on well-formed pages; callers may skip counting them.
+UNIQUE_BY_CONTRACT_RULES = frozenset({"stable_attr:id", "stable_attr:data-testid"})
+
 
 @dataclass(slots=True)
 class CandidateDraft:
@@ -51,11 +203,11 @@ class CandidateDraft:
 @dataclass(slots=True)
 class DomAnalyzer:
     summary: ElementSummary
+    tag: str = field(init=False)
+    _text_sources: list[tuple[str, str]] | None = field(init=False, default=None, repr=False)
 
-    @property
-    def tag(self) -> str:
-        raw = (self.summary.tag or "").strip().lower()
-        return raw or "*"
+    def __post_init__(self) -> None:
+        self.tag = (self.summary.tag or "").strip().lower() or "*"
 
     def attr(self, key: str) -> str | None:
         raw = self.summary.attributes.get(key)
@@ -65,6 +217,11 @@ class DomAnalyzer:
         return value or None
 
     def normalized_text_sources(self) -> list[tuple[str, str]]:
+        if self._text_sources is None:
+            self._text_sources = self._build_text_sources()
+        return self._text_sources
+
+    def _build_text_sources(self) -> list[tuple[str, str]]:
         raw_sources: list[tuple[str, str | None]] = [
             ("text", self.summary.text),
             ("aria_label", self.summary.aria_label or self.attr("aria-label")),
@@ -90,12 +247,26 @@ class DomAnalyzer:
 
 
 class CandidateFactory:
-    def __init__(self, page: Page, element: ElementHandle, analyzer: DomAnalyzer) -> None:
+    def __init__(
+        self,
+        page: Page,
+        element: ElementHandle,
+        analyzer: DomAnalyzer,
+        count_cache: dict[tuple[str, str], int] | None = None,
+    ) -> None:
         self.page = page
         self.element = element
         self.analyzer = analyzer
+        self.count_cache = {} if count_cache is None else count_cache
         self._drafts: list[CandidateDraft] = []
         self._seen: set[tuple[str, str]] = set()
+        self._context: dict[str, Any] | None = None
+
+    @property
+    def element_context(self) -> dict[str, Any]:
+        if self._context is None:
+            self._context = _element_context(self.element)
+        return self._context
 
     def generate(self) -> list[CandidateDraft]:
         self._add_promoted_clickable_ancestor()
@@ -114,7 +285,11 @@ class CandidateFactory:
         return list(self._drafts)
 
     def _add_promoted_clickable_ancestor(self) -> None:
-        promoted = _build_promoted_clickable_ancestor_drafts(self.page, self.element)
+        promoted = _build_promoted_drafts_from_snapshot(
+            self.page,
+            self.element_context.get("clickable"),
+            self.count_cache,
+        )
         if not promoted:
             return
         for draft in promoted:
@@ -133,7 +308,7 @@ class CandidateFactory:
             _add_unique(self._drafts, draft, self._seen)
 
     def _add_data_attr_strategies(self) -> None:
-        for attr in ("data-testid", "data-test", "data-qa", "data-cy", "data-e2e"):
+        for attr in TEST_ATTR_PRIORITY:
             raw = self.analyzer.attr(attr)
             if not raw:
                 continue
@@ -158,10 +333,12 @@ class CandidateFactory:
             _add_unique(self._drafts, draft, self._seen)
 
     def _add_accessibility_strategies(self) -> None:
-        tag = self.analyzer.tag
-        aria_label = self.analyzer.attr("aria-label") or self.analyzer.summary.aria_label
-        role = self.analyzer.attr("role") or self.analyzer.summary.role
-        title = self.analyzer.attr("title") or self.analyzer.summary.title
+        analyzer = self.analyzer
+        summary = analyzer.summary
+        tag = analyzer.tag
+        aria_label = analyzer.attr("aria-label") or summary.aria_label
+        role = analyzer.attr("role") or summary.role
+        title = analyzer.attr("title") or summary.title
 
         if aria_label and is_stable_attribute_value("aria-label", aria_label):
             if role and is_stable_attribute_value("role", role):
@@ -182,8 +359,9 @@ class CandidateFactory:
                     ),
                     self._seen,
                 )
-                if self.analyzer.normalized_text_sources():
-                    role_text = self.analyzer.normalized_text_sources()[0][1]
+                text_sources = self.analyzer.normalized_text_sources()
+                if text_sources:
+                    role_text = text_sources[0][1]
                     xpath = (
                         f"//*[@role={_xpath_literal(role)}]"
                         f"//*[self::{tag}][contains(normalize-space(), {_xpath_literal(role_text)})]"
@@ -245,7 +423,7 @@ class CandidateFactory:
     def _add_placeholder_and_label_strategies(self) -> None:
         tag = self.analyzer.tag
         placeholder = self.analyzer.attr("placeholder") or self.analyzer.summary.placeholder
-        if placeholder and tag in {"input", "textarea", "select"}:
+        if placeholder and tag in _FORM_FIELD_TAGS:
             css = f'{tag}[placeholder="{_escape_css_string(placeholder)}"]'
             _add_unique(
                 self._drafts,
@@ -283,7 +461,7 @@ class CandidateFactory:
             )
 
         label_text = normalize_space(self.analyzer.summary.label_text, limit=100)
-        if label_text and tag in {"input", "textarea", "select"}:
+        if label_text and tag in _FORM_FIELD_TAGS:
             xpath = (
                 "//label[normalize-space()="
                 f"{_xpath_literal(label_text)}"
@@ -307,9 +485,8 @@ class CandidateFactory:
 
     def _add_class_and_ancestor_fallbacks(self) -> None:
         tag = self.analyzer.tag
-        meaningful_classes = [
-            cls for cls in self.analyzer.summary.classes if cls and not is_dynamic_class(cls)
-        ]
+        classes = self.analyzer.summary.classes
+        meaningful_classes = [cls for cls in classes if cls and not is_dynamic_class(cls)]
         if meaningful_classes:
             css = f"{tag}.{_escape_css_identifier(meaningful_classes[0])}"
             _add_unique(
@@ -321,14 +498,14 @@ class CandidateFactory:
                     metadata={
                         "strategy_type": "class",
                         "strategy_key": build_strategy_key("class", attr="class", value=meaningful_classes[0]),
-                        "dynamic_class_count": max(0, len(self.analyzer.summary.classes) - len(meaningful_classes)),
+                        "dynamic_class_count": max(0, len(classes) - len(meaningful_classes)),
                         "generic_penalty": 8.0,
                     },
                 ),
                 self._seen,
             )
 
-        ancestor = _nearest_stable_ancestor(self.element)
+        ancestor = self.element_context.get("ancestor")
         if ancestor:
             contextual_xpath = self._build_contextual_xpath(
                 tag=tag,
@@ -381,7 +558,7 @@ class CandidateFactory:
         )
 
     def _add_nth_fallback(self) -> None:
-        fallback = _nth_fallback_path(self.element)
+        fallback = str(self.element_context.get("fallback") or "")
         if not fallback:
             return
         _add_unique(
@@ -401,7 +578,7 @@ class CandidateFactory:
         )
 
     def _add_text_xpath_strategy(self) -> None:
-        text_draft = _build_text_xpath_draft(self.page, self.analyzer)
+        text_draft = _build_text_xpath_draft(self.page, self.analyzer, self.count_cache)
         _add_unique(self._drafts, text_draft, self._seen)
 
     def _add_prefix_salvage_strategy(
@@ -465,25 +642,17 @@ def normalize_classes(raw: Sequence[str] | str | None) -> list[str]:
     if not raw:
         return []
     if isinstance(raw, str):
-        items = raw.split()
-    else:
-        items = [item for item in raw if isinstance(item, str)]
-
-    seen: set[str] = set()
-    normalized: list[str] = []
-    for item in items:
-        clean = item.strip()
-        if not clean or clean in seen:
-            continue
-        seen.add(clean)
-        normalized.append(clean)
-    return normalized
+        return list(dict.fromkeys(raw.split()))
+    cleaned = dict.fromkeys(item.strip() for item in raw if isinstance(item, str))
+    cleaned.pop("", None)
+    return list(cleaned)
 
 
 def is_dynamic_class(class_name: str) -> bool:
     return is_dynamic_class_token(class_name)
 
 
+@lru_cache(maxsize=4096)
 def is_dynamic_id(id_value: str) -> bool:
     value = id_value.strip()
     if not value:
@@ -492,31 +661,28 @@ def is_dynamic_id(id_value: str) -> bool:
         return True
     if ":" not in value:
         return False
-    if re.search(r":\d+:", value):
+    if _JSF_INDEX_SEGMENT_RE.search(value):
         return True
 
     tokens = [token for token in value.split(":") if token]
     for token in tokens:
-        if any(pattern.fullmatch(token) for pattern in _DYNAMIC_ID_TOKEN_PATTERNS):
+        if _DYNAMIC_ID_TOKEN_RE.fullmatch(token):
             return True
     return False
 
 
+@lru_cache(maxsize=4096)
 def extract_dynamic_id_prefix_suffix(id_value: str) -> tuple[str, str] | None:
     value = id_value.strip()
-    if not is_dynamic_id(value):
+    if ":" not in value:
         return None
 
+    # Any dynamic token after the first segment already makes is_dynamic_id() true.
     tokens = value.split(":")
-    dynamic_indexes = [
-        index
-        for index, token in enumerate(tokens)
-        if any(pattern.fullmatch(token) for pattern in _DYNAMIC_ID_TOKEN_PATTERNS)
-    ]
-    if not dynamic_indexes:
-        return None
-
-    last_dynamic_index = dynamic_indexes[-1]
+    last_dynamic_index = -1
+    for index, token in enumerate(tokens):
+        if _DYNAMIC_ID_TOKEN_RE.fullmatch(token):
+            last_dynamic_index = index
     if last_dynamic_index <= 0:
         return None
 
@@ -534,38 +700,50 @@ def build_dynamic_id_partial_locators(id_value: str) -> tuple[str, str] | None:
 
     prefix, suffix = parts
     css = f'[id^="{_escape_css_string(prefix)}"][id$="{_escape_css_string(suffix)}"]'
+    suffix_literal = _xpath_literal(suffix)
     xpath = (
         "//*["
         f"starts-with(@id,{_xpath_literal(prefix)}) "
         "and "
-        f"substring(@id, string-length(@id) - string-length({_xpath_literal(suffix)}) + 1) = {_xpath_literal(suffix)}"
+        f"substring(@id, string-length(@id) - string-length({suffix_literal}) + 1) = {suffix_literal}"
         "]"
     )
     return css, xpath
 
 
+_CSS_STRING_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"'})
+
+
 def _escape_css_string(value: str) -> str:
-    return value.replace("\\", "\\\\").replace('"', '\\"')
+    if "\\" not in value and '"' not in value:
+        return value
+    return value.translate(_CSS_STRING_ESCAPES)
+
+
+class _CssIdentifierEscapes(dict[int, str]):
+    def __missing__(self, codepoint: int) -> str:
+        char = chr(codepoint)
+        escaped = char if char.isalnum() or char in ("-", "_") else f"\\{codepoint:x} "
+        self[codepoint] = escaped
+        return escaped
+
+
+_CSS_IDENTIFIER_ESCAPES = _CssIdentifierEscapes()
 
 
 def _escape_css_identifier(value: str) -> str:
-    escaped: list[str] = []
-    for char in value:
-        if char.isalnum() or char in ("-", "_"):
-            escaped.append(char)
-        else:
-            escaped.append(f"\\{ord(char):x} ")
-    return "".join(escaped)
+    if value.replace("-", "a").replace("_", "a").isalnum():
+        return value
+    return value.translate(_CSS_IDENTIFIER_ESCAPES)
 
 
+@lru_cache(maxsize=256)
 def _xpath_literal(value: str) -> str:
     if "'" not in value:
         return f"'{value}'"
     if '"' not in value:
         return f'"{value}"'
-    pieces = value.split("'")
-    quoted = [f"'{piece}'" for piece in pieces]
-    return "concat(" + ", \"'\", ".join(quoted) + ")"
+    return "concat('" + "', \"'\", '".join(value.split("'")) + "')"
 
 
 def _short_text(value: str | None, limit: int = 80) -> str | None:
@@ -581,45 +759,9 @@ def _add_unique(drafts: list[CandidateDraft], draft: CandidateDraft, seen: set[t
     drafts.append(draft)
 
 
-def _count_matches(page: Page, draft: CandidateDraft) -> int:
-    return count_locator_matches(page, draft.locator_type, draft.locator, draft.metadata)
-
-
 def _extract_dom_snapshot(page: Page) -> dict[str, Any]:
     try:
-        payload = page.evaluate(
-            """
-            () => {
-              const nodes = Array.from(document.querySelectorAll('*'));
-              const tagHistogram = {};
-              const attrHistogram = {};
-              let textNodeCount = 0;
-
-              for (const node of nodes) {
-                const tag = (node.tagName || '').toLowerCase();
-                if (tag) {
-                  tagHistogram[tag] = (tagHistogram[tag] || 0) + 1;
-                }
-                for (const attr of Array.from(node.attributes || [])) {
-                  attrHistogram[attr.name] = (attrHistogram[attr.name] || 0) + 1;
-                }
-                const text = (node.innerText || node.textContent || '').trim();
-                if (text) {
-                  textNodeCount += 1;
-                }
-              }
-
-              return {
-                node_count: nodes.length,
-                text_node_count: textNodeCount,
-                title: document.title || '',
-                url: location.href || '',
-                tag_histogram: tagHistogram,
-                attr_histogram: attrHistogram,
-              };
-            }
-            """
-        )
+        payload = page.evaluate(_DOM_SNAPSHOT_SCRIPT)
         if isinstance(payload, dict):
             return payload
     except Exception:
@@ -634,86 +776,34 @@ def _extract_dom_snapshot(page: Page) -> dict[str, Any]:
     }
 
 
-def _nearest_stable_ancestor(element: ElementHandle) -> dict[str, str] | None:
-    return element.evaluate(
-        """
-        (el) => {
-          const attrs = ['data-testid', 'data-test', 'data-qa', 'data-cy', 'data-e2e', 'aria-label', 'name'];
-          let current = el.parentElement;
-          let hops = 0;
-          while (current && hops < 2) {
-            const tag = (current.tagName || '').toLowerCase();
-            if (!tag || tag === 'html' || tag === 'body') {
-              current = current.parentElement;
-              hops += 1;
-              continue;
-            }
-            for (const attr of attrs) {
-              const value = current.getAttribute(attr);
-              if (value) {
-                return {
-                  tag,
-                  attr,
-                  value,
-                };
-              }
-            }
-            current = current.parentElement;
-            hops += 1;
-          }
-          return null;
-        }
-        """
-    )
+def _element_context(element: ElementHandle) -> dict[str, Any]:
+    payload = element.evaluate(_CACHED_ELEMENT_CONTEXT_SCRIPT)
+    if not _is_element_context(payload):
+        payload = element.evaluate(_INSTALL_ELEMENT_CONTEXT_SCRIPT)
+    if not _is_element_context(payload):
+        return dict(_EMPTY_ELEMENT_CONTEXT)
+    return payload
 
 
-def _nth_fallback_path(element: ElementHandle) -> str:
-    return element.evaluate(
-        """
-        (el) => {
-          const parts = [];
-          let current = el;
-          while (current && current.nodeType === Node.ELEMENT_NODE && parts.length < 6) {
-            const tag = current.tagName.toLowerCase();
-            if (current.id) {
-              parts.unshift(`#${CSS.escape(current.id)}`);
-              break;
-            }
-            let nth = 1;
-            let sibling = current;
-            while ((sibling = sibling.previousElementSibling)) {
-              if (sibling.tagName.toLowerCase() === tag) {
-                nth += 1;
-              }
-            }
-            parts.unshift(`${tag}:nth-of-type(${nth})`);
-            current = current.parentElement;
-          }
-          return parts.join(' > ');
-        }
-        """
-    )
+def _is_element_context(payload: Any) -> bool:
+    return isinstance(payload, dict) and payload.keys() == _EMPTY_ELEMENT_CONTEXT.keys()
 
 
 def _stable_attr_css(tag: str, attr: str, value: str) -> str:
     if attr == "id":
-        if re.match(r"^[A-Za-z_][A-Za-z0-9_-]*$", value):
+        if _CSS_SAFE_ID_RE.match(value):
             return f"#{_escape_css_identifier(value)}"
         return f'{tag}[id="{_escape_css_string(value)}"]'
 
-    if attr in {"data-testid", "data-test", "data-qa", "data-cy", "data-e2e"}:
+    if attr in _TEST_ATTRS:
         return f'[{attr}="{_escape_css_string(value)}"]'
 
     return f'{tag}[{attr}="{_escape_css_string(value)}"]'
 
 
 def _is_blocked_id(tag: str, value: str) -> bool:
-    normalized_tag = tag.strip().lower()
-    if normalized_tag in {"html", "body"}:
-        return True
-    if is_blocked_root_id(value):
-        return True
-    return False
+    # Callers pass the already-normalized tag from DomAnalyzer or the ancestor snapshot.
+    return tag in _ROOT_TAGS or is_blocked_root_id(value)
 
 
 def _build_stable_attr_drafts(
@@ -802,50 +892,20 @@ def _build_stable_attr_drafts(
     ]
 
 
-def _find_clickable_ancestor_snapshot(element: ElementHandle) -> dict[str, Any] | None:
-    return element.evaluate(
-        """
-        (el) => {
-          const attrs = ['data-testid', 'data-test', 'data-qa', 'data-cy', 'data-e2e', 'id', 'name', 'aria-label'];
-          let current = el;
-          while (current && current.nodeType === Node.ELEMENT_NODE) {
-            const tag = current.tagName.toLowerCase();
-            const role = (current.getAttribute('role') || '').toLowerCase();
-            const inputType = (current.getAttribute('type') || '').toLowerCase();
-            const clickableInput = tag === 'input' && ['button', 'submit', 'reset'].includes(inputType);
-            const clickableRole = ['button', 'tab', 'link'].includes(role);
-            const clickable = tag === 'a' || tag === 'button' || clickableInput || clickableRole;
-            if (clickable) {
-              const found = {};
-              for (const attr of attrs) {
-                const value = current.getAttribute(attr);
-                if (value) {
-                  found[attr] = value;
-                }
-              }
-              return { tag, role, inputType, attrs: found };
-            }
-            current = current.parentElement;
-          }
-          return null;
-        }
-        """
-    )
-
-
 def _is_clickable_ancestor_snapshot(snapshot: dict[str, Any]) -> bool:
     tag = str(snapshot.get("tag") or "").strip().lower()
-    role = str(snapshot.get("role") or "").strip().lower()
-    input_type = str(snapshot.get("inputType") or "").strip().lower()
-    if tag in {"a", "button"}:
+    if tag in _CLICKABLE_TAGS:
         return True
-    if tag == "input" and input_type in {"button", "submit", "reset"}:
+    if tag == "input" and str(snapshot.get("inputType") or "").strip().lower() in _CLICKABLE_INPUT_TYPES:
         return True
-    return role in {"button", "tab", "link"}
+    return str(snapshot.get("role") or "").strip().lower() in _CLICKABLE_ROLES
 
 
-def _build_promoted_clickable_ancestor_drafts(page: Page, element: ElementHandle) -> list[CandidateDraft] | None:
-    snapshot = _find_clickable_ancestor_snapshot(element)
+def _build_promoted_drafts_from_snapshot(
+    page: Page,
+    snapshot: dict[str, Any] | None,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> list[CandidateDraft] | None:
     if not snapshot:
         return None
     if not _is_clickable_ancestor_snapshot(snapshot):
@@ -856,6 +916,7 @@ def _build_promoted_clickable_ancestor_drafts(page: Page, element: ElementHandle
     if not tag or not isinstance(attrs, dict):
         return None
 
+    eligible: list[tuple[str, str, AttributeStability, str]] = []
     for attr in PROMOTABLE_STABLE_ATTRS:
         value = attrs.get(attr)
         if not value or not isinstance(value, str):
@@ -865,42 +926,54 @@ def _build_promoted_clickable_ancestor_drafts(page: Page, element: ElementHandle
         analysis = analyze_attribute_stability(attr, value)
         if not analysis.stable:
             continue
+        eligible.append((attr, value, analysis, _stable_attr_css(tag, attr, value)))
 
-        css = _stable_attr_css(tag, attr, value)
-        try:
-            if len(page.query_selector_all(css)) != 1:
-                continue
-        except Exception:
-            continue
-        return _build_stable_attr_drafts(tag, attr, value, stability=analysis)
+    if not eligible:
+        return None
+    counts = count_locator_matches_batch(
+        page,
+        [("CSS", css, None) for _, _, _, css in eligible],
+        cache=count_cache,
+    )
+    for (attr, value, analysis, _), count in zip(eligible, counts):
+        if count == 1:
+            return _build_stable_attr_drafts(tag, attr, value, stability=analysis)
 
     return None
 
 
 def extract_css_parent_if_descendant(locator: str) -> str | None:
+    # Every whitespace char other than " " is non-printable, so this rules out any descendant split.
+    if " " not in locator and locator.isprintable():
+        return None
+
+    # Scan right-to-left so the last descendant combinator is found first.
     in_quote: str | None = None
     bracket_depth = 0
     paren_depth = 0
-    split_index = -1
 
-    for index, char in enumerate(locator):
-        if in_quote:
-            if char == in_quote and locator[index - 1] != "\\":
+    for index in range(len(locator) - 1, -1, -1):
+        char = locator[index]
+        if char in _CSS_QUOTES:
+            if _is_escaped(locator, index):
+                continue
+            if in_quote is None:
+                in_quote = char
+            elif char == in_quote:
                 in_quote = None
             continue
-        if char in {"'", '"'}:
-            in_quote = char
+        if in_quote:
             continue
-        if char == "[":
+        if char == "]":
             bracket_depth += 1
             continue
-        if char == "]":
+        if char == "[":
             bracket_depth = max(0, bracket_depth - 1)
             continue
-        if char == "(":
+        if char == ")":
             paren_depth += 1
             continue
-        if char == ")":
+        if char == "(":
             paren_depth = max(0, paren_depth - 1)
             continue
         if bracket_depth > 0 or paren_depth > 0 or not char.isspace():
@@ -914,60 +987,69 @@ def extract_css_parent_if_descendant(locator: str) -> str | None:
             right += 1
         if left < 0 or right >= len(locator):
             continue
-        if locator[left] in {">", "+", "~", ","} or locator[right] in {">", "+", "~", ","}:
+        if locator[left] in _CSS_COMBINATORS or locator[right] in _CSS_COMBINATORS:
             continue
-        split_index = index
+        return locator[:index].rstrip()
 
-    if split_index < 0:
-        return None
-    parent = locator[:split_index].rstrip()
-    child = locator[split_index:].strip()
-    if not parent or not child:
-        return None
-    return parent
+    return None
 
 
-def _prune_descendant_css_locator(page: Page, locator: str) -> str:
+def _is_escaped(text: str, index: int) -> bool:
+    backslashes = 0
+    cursor = index - 1
+    while cursor >= 0 and text[cursor] == "\\":
+        backslashes += 1
+        cursor -= 1
+    return backslashes % 2 == 1
+
+
+def _prunable_css_parent(locator: str) -> str | None:
     parent = extract_css_parent_if_descendant(locator)
     if not parent:
-        return locator
+        return None
     parent_lower = parent.strip().lower()
-    if parent_lower in {"html", "body"}:
-        return locator
+    if parent_lower in _ROOT_TAGS:
+        return None
     if parent.startswith("#"):
         parent_id = parent[1:].strip().lower()
         if parent_id in ROOT_ID_BLOCKLIST_LOWER:
-            return locator
-    try:
-        if len(page.query_selector_all(parent)) == 1:
-            return parent
-    except Exception:
-        return locator
-    return locator
+            return None
+    return parent
 
 
-def _prune_descendant_css_drafts(page: Page, drafts: Iterable[CandidateDraft]) -> list[CandidateDraft]:
+def _prune_descendant_css_drafts(
+    page: Page,
+    drafts: Iterable[CandidateDraft],
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> list[CandidateDraft]:
+    drafts = list(drafts)
+    parents = [_prunable_css_parent(draft.locator) if draft.locator_type == "CSS" else None for draft in drafts]
+    prunable = [index for index, parent in enumerate(parents) if parent]
+    parent_counts = dict(
+        zip(
+            prunable,
+            count_locator_matches_batch(
+                page,
+                [("CSS", parents[index], None) for index in prunable],
+                cache=count_cache,
+            ),
+        )
+    )
+
     pruned: list[CandidateDraft] = []
     seen: set[tuple[str, str]] = set()
-    for draft in drafts:
+    for index, draft in enumerate(drafts):
         updated = draft
-        if draft.locator_type == "CSS":
-            locator = _prune_descendant_css_locator(page, draft.locator)
-            if locator != draft.locator:
-                metadata = dict(draft.metadata)
-                metadata["descendant_pruned"] = True
-                updated = CandidateDraft(
-                    locator_type=draft.locator_type,
-                    locator=locator,
-                    rule=draft.rule,
-                    metadata=metadata,
-                )
-
-        key = (updated.locator_type, updated.locator)
-        if key in seen:
-            continue
-        seen.add(key)
-        pruned.append(updated)
+        if parent_counts.get(index) == 1:
+            metadata = dict(draft.metadata)
+            metadata["descendant_pruned"] = True
+            updated = CandidateDraft(
+                locator_type=draft.locator_type,
+                locator=parents[index],
+                rule=draft.rule,
+                metadata=metadata,
+            )
+        _add_unique(pruned, updated, seen)
     return pruned
 
 
@@ -1054,7 +1136,11 @@ def _dedupe_semantic_candidates(candidates: list[LocatorCandidate]) -> list[Loca
     return deduped
 
 
-def _build_text_xpath_draft(page: Page, analyzer: DomAnalyzer) -> CandidateDraft:
+def _build_text_xpath_draft(
+    page: Page,
+    analyzer: DomAnalyzer,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> CandidateDraft:
     tag = analyzer.tag
     text_sources = analyzer.normalized_text_sources()
 
@@ -1076,11 +1162,11 @@ def _build_text_xpath_draft(page: Page, analyzer: DomAnalyzer) -> CandidateDraft
     source, value = text_sources[0]
 
     if source == "text":
-        xpath = _best_visible_text_xpath(page, tag, value)
+        xpath = _best_visible_text_xpath(page, tag, value, count_cache)
     elif source in {"aria_label", "title", "placeholder", "value"}:
-        xpath = _best_attribute_text_xpath(page, tag, source, value)
+        xpath = _best_attribute_text_xpath(page, tag, source, value, count_cache)
     else:
-        xpath = _best_contains_text_xpath(page, tag, value)
+        xpath = _best_contains_text_xpath(page, tag, value, count_cache)
 
     return CandidateDraft(
         locator_type="XPath",
@@ -1096,27 +1182,38 @@ def _build_text_xpath_draft(page: Page, analyzer: DomAnalyzer) -> CandidateDraft
     )
 
 
-def _best_visible_text_xpath(page: Page, tag: str, value: str) -> str:
+def _best_visible_text_xpath(
+    page: Page,
+    tag: str,
+    value: str,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> str:
     literal = _xpath_literal(value)
     candidates = [f"//{tag}[normalize-space()={literal}]"]
 
-    if tag in {"button", "a", "span"}:
+    if tag in _TEXT_CLICK_TAGS:
         candidates.append(
             f"//*[self::button or self::a or self::span][normalize-space()={literal}]"
         )
 
     for candidate in candidates:
-        if count_locator_matches(page, "XPath", candidate, None) == 1:
+        if count_locator_matches(page, "XPath", candidate, cache=count_cache) == 1:
             return candidate
 
-    contains_candidate = _best_contains_text_xpath(page, tag, value)
-    if count_locator_matches(page, "XPath", contains_candidate, None) == 1:
+    contains_candidate = _best_contains_text_xpath(page, tag, value, count_cache)
+    if count_locator_matches(page, "XPath", contains_candidate, cache=count_cache) == 1:
         return contains_candidate
 
     return candidates[0]
 
 
-def _best_attribute_text_xpath(page: Page, tag: str, source: str, value: str) -> str:
+def _best_attribute_text_xpath(
+    page: Page,
+    tag: str,
+    source: str,
+    value: str,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> str:
     attr_map = {
         "aria_label": "aria-label",
         "title": "title",
@@ -1133,18 +1230,23 @@ def _best_attribute_text_xpath(page: Page, tag: str, source: str, value: str) ->
     ]
 
     for candidate in candidates:
-        if count_locator_matches(page, "XPath", candidate, None) == 1:
+        if count_locator_matches(page, "XPath", candidate, cache=count_cache) == 1:
             return candidate
 
     return candidates[0]
 
 
-def _best_contains_text_xpath(page: Page, tag: str, value: str) -> str:
+def _best_contains_text_xpath(
+    page: Page,
+    tag: str,
+    value: str,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> str:
     snippets = _text_snippets(value)
     for snippet in snippets:
         literal = _xpath_literal(snippet)
         candidate = f"//{tag}[contains(normalize-space(), {literal})]"
-        if count_locator_matches(page, "XPath", candidate, None) == 1:
+        if count_locator_matches(page, "XPath", candidate, cache=count_cache) == 1:
             return candidate
 
     fallback = snippets[0] if snippets else value
@@ -1186,18 +1288,58 @@ def _strategy_type_from_draft(draft: CandidateDraft) -> str:
     return str(draft.metadata.get("strategy_type") or "fallback").strip().lower()
 
 
-def _validate_drafts(page: Page, drafts: Iterable[CandidateDraft], snapshot: Mapping[str, Any]) -> list[LocatorCandidate]:
+def _count_drafts(
+    page: Page,
+    drafts: Sequence[CandidateDraft],
+    *,
+    verify_unique: bool = True,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> list[int | None]:
+    verified = [
+        index
+        for index, draft in enumerate(drafts)
+        if verify_unique or draft.rule not in UNIQUE_BY_CONTRACT_RULES
+    ]
+    counts: list[int | None] = [None] * len(drafts)
+    batch_counts = count_locator_matches_batch(
+        page,
+        [(drafts[index].locator_type, drafts[index].locator, drafts[index].metadata) for index in verified],
+        cache=count_cache,
+    )
+    for index, match_count in zip(verified, batch_counts):
+        counts[index] = match_count
+    return counts
+
+
+def _validate_drafts(
+    page: Page,
+    drafts: Iterable[CandidateDraft],
+    snapshot: Mapping[str, Any],
+    *,
+    verify_unique: bool = True,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> list[LocatorCandidate]:
     candidates: list[LocatorCandidate] = []
     node_count = int(snapshot.get("node_count", 0) or 0)
     text_node_count = int(snapshot.get("text_node_count", 0) or 0)
-    for draft in drafts:
-        check = validate_locator_candidate(page, draft.locator_type, draft.locator, draft.metadata)
+    drafts = list(drafts)
+    counts = _count_drafts(page, drafts, verify_unique=verify_unique, count_cache=count_cache)
+
+    for draft, counted in zip(drafts, counts):
+        check = validate_locator_candidate(
+            page,
+            draft.locator_type,
+            draft.locator,
+            draft.metadata,
+            match_count=1 if counted is None else counted,
+        )
         metadata = dict(draft.metadata)
         metadata["stable"] = bool(check.stable)
         metadata["validation_message"] = check.message
         metadata["snapshot_node_count"] = node_count
         metadata["snapshot_text_node_count"] = text_node_count
         metadata["output_type"] = _output_type(metadata, draft.locator_type)
+        metadata["uniqueness_verified"] = counted is not None
 
         candidates.append(
             LocatorCandidate(
@@ -1228,10 +1370,21 @@ def _passes_quality_gate(candidate: LocatorCandidate) -> bool:
     return candidate.uniqueness_count == 1
 
 
-def _build_candidate_drafts(element: ElementHandle, summary: ElementSummary, page: Page) -> list[CandidateDraft]:
-    factory = CandidateFactory(page=page, element=element, analyzer=DomAnalyzer(summary=summary))
+def _build_candidate_drafts(
+    element: ElementHandle,
+    summary: ElementSummary,
+    page: Page,
+    *,
+    count_cache: dict[tuple[str, str], int] | None = None,
+) -> list[CandidateDraft]:
+    factory = CandidateFactory(
+        page=page,
+        element=element,
+        analyzer=DomAnalyzer(summary=summary),
+        count_cache=count_cache,
+    )
     drafts = factory.generate()
-    return _prune_descendant_css_drafts(page, drafts)
+    return _prune_descendant_css_drafts(page, drafts, factory.count_cache)
 
 
 def generate_locator_candidates(
@@ -1240,17 +1393,44 @@ def generate_locator_candidates(
     summary: ElementSummary,
     learning_weights: dict[str, float] | None = None,
     limit: int = 5,
+    *,
+    verify_unique: bool = True,
 ) -> list[LocatorCandidate]:
     cap = max(1, min(5, int(limit)))
     snapshot = _extract_dom_snapshot(page)
+    # Selectors counted while building drafts are reused during validation.
+    count_cache: dict[tuple[str, str], int] = {}
+
+    drafts = _build_candidate_drafts(element, summary, page, count_cache=count_cache)
+    validated = _validate_drafts(
+        page,
+        drafts,
+        snapshot,
+        verify_unique=verify_unique,
+        count_cache=count_cache,
+    )
+    return _select_final_candidates(validated, summary, learning_weights, cap)
 
-    drafts = _build_candidate_drafts(element, summary, page)
-    validated = _validate_drafts(page, drafts, snapshot)
-
-    filtered = [candidate for candidate in validated if _passes_quality_gate(candidate)]
 
-    if not any(_is_text_xpath_candidate(candidate) for candidate in filtered):
-        filtered.extend(candidate for candidate in validated if _is_text_xpath_candidate(candidate))
+def _select_final_candidates(
+    validated: list[LocatorCandidate],
+    summary: ElementSummary,
+    learning_weights: dict[str, float] | None,
+    cap: int,
+) -> list[LocatorCandidate]:
+    filtered: list[LocatorCandidate] = []
+    text_candidates: list[LocatorCandidate] = []
+    has_text_candidate = False
+    for candidate in validated:
+        is_text = _is_text_xpath_candidate(candidate)
+        if is_text:
+            text_candidates.append(candidate)
+        if _passes_quality_gate(candidate):
+            filtered.append(candidate)
+            has_text_candidate = has_text_candidate or is_text
+
+    if not has_text_candidate:
+        filtered.extend(text_candidates)
 
     if not filtered:
         filtered = validated
@@ -5,29 +5,26 @@ import re
 from .models import LocatorCandidate
 from .selector_rules import is_absolute_xpath, is_forbidden_locator, is_index_based_xpath
 
+_ID_VALUE_RE = re.compile(r"id\s*[\^$*]?=\s*\"([^\"]+)\"|id\s*[\^$*]?=\s*'([^']+)'|#([A-Za-z0-9_:-]+)")
+# Numeric drift suffix, all-digit id, or a long hex run; case folding is scoped to the hex branch.
+_DYNAMIC_ID_TOKEN_RE = re.compile(r"(?:[A-Za-z]{1,4}|[_:-])\d{4,}$|^[0-9]+\Z|^(?i:[a-f0-9]{16,})\Z")
+
 
 def recommend_locator_candidates(candidates: list[LocatorCandidate]) -> list[LocatorCandidate]:
-    scored_rows: list[tuple[LocatorCandidate, float, bool, tuple[str, ...]]] = []
     for candidate in candidates:
         score, reasons, risky = score_locator_for_write(candidate)
-        scored_rows.append((candidate, score, risky, reasons))
-
-    scored_rows.sort(key=lambda row: row[1], reverse=True)
-
-    ordered: list[LocatorCandidate] = []
-    for index, (candidate, score, risky, reasons) in enumerate(scored_rows):
-        label = ""
-        if index == 0:
-            label = "Recommended"
-        elif risky:
-            label = "Risky"
-
-        candidate.metadata["write_recommendation_score"] = score
-        candidate.metadata["write_recommendation_label"] = label
-        candidate.metadata["write_recommendation_risky"] = risky
-        candidate.metadata["write_recommendation_reasons"] = list(reasons)
-        ordered.append(candidate)
-
+        candidate.metadata.update(
+            {
+                "write_recommendation_score": score,
+                "write_recommendation_label": "Risky" if risky else "",
+                "write_recommendation_risky": risky,
+                "write_recommendation_reasons": list(reasons),
+            }
+        )
+
+    ordered = sorted(candidates, key=lambda item: item.metadata["write_recommendation_score"], reverse=True)
+    if ordered:
+        ordered[0].metadata["write_recommendation_label"] = "Recommended"
     return ordered
 
 
@@ -75,15 +72,20 @@ def score_locator_for_write(candidate: LocatorCandidate) -> tuple[float, tuple[s
         score -= 20
         reasons.append("penalty:no-match")
 
-    if is_forbidden_locator(locator, candidate.locator_type):
+    forbidden = is_forbidden_locator(locator, candidate.locator_type)
+    if forbidden:
         score -= 45
         reasons.append("penalty:forbidden-pattern")
 
+    absolute_xpath = False
+    index_based = False
     if candidate.locator_type == "XPath":
-        if is_absolute_xpath(locator):
+        absolute_xpath = is_absolute_xpath(locator)
+        index_based = is_index_based_xpath(locator)
+        if absolute_xpath:
             score -= 55
             reasons.append("penalty:absolute-xpath")
-        if is_index_based_xpath(locator):
+        if index_based:
             score -= 38
             reasons.append("penalty:index")
         if "normalize-space" in lowered:
@@ -109,25 +111,18 @@ def score_locator_for_write(candidate: LocatorCandidate) -> tuple[float, tuple[s
     risky = (
         bounded < 35
         or candidate.uniqueness_count != 1
-        or is_forbidden_locator(locator, candidate.locator_type)
-        or (candidate.locator_type == "XPath" and (is_absolute_xpath(locator) or is_index_based_xpath(locator)))
+        or forbidden
+        or absolute_xpath
+        or index_based
     )
     return bounded, tuple(reasons), risky
 
 
 def _looks_dynamic_id(locator: str) -> bool:
-    parts = re.findall(r"id\s*[\^$*]?=\s*\"([^\"]+)\"|id\s*[\^$*]?=\s*'([^']+)'|#([A-Za-z0-9_:-]+)", locator)
-    tokens = [next((piece for piece in group if piece), "") for group in parts]
-    for token in tokens:
-        cleaned = token.strip()
-        if not cleaned:
-            continue
-        if re.search(r"[A-Za-z]{1,4}\d{4,}$", cleaned):
-            return True
-        if re.search(r"[_:-]\d{4,}$", cleaned):
-            return True
-        if re.fullmatch(r"[0-9]+", cleaned):
-            return True
-        if re.fullmatch(r"[a-f0-9]{16,}", cleaned, flags=re.IGNORECASE):
+    if "id" not in locator and "#" not in locator:
+        return False
+    for match in _ID_VALUE_RE.finditer(locator):
+        cleaned = (match.group(1) or match.group(2) or match.group(3) or "").strip()
+        if cleaned and _DYNAMIC_ID_TOKEN_RE.search(cleaned):
             return True
     return False
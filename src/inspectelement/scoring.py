@@ -41,6 +41,8 @@ STRATEGY_BASE_BONUS: dict[str, float] = {
     "fallback": -20.0,
 }
 
+_DYNAMIC_CLASS_LOCATOR_RE = re.compile(r"\.(?:[a-f0-9]{8,}|css-[a-z0-9_-]{4,}|jss\d+|sc-[a-z0-9]+)")
+
 
 def _base_stability(rule: str) -> float:
     if rule in BASE_RULE_SCORES:
@@ -214,11 +216,4 @@ def _confidence_from_score(score: float) -> ConfidenceLevel:
 
 
 def _looks_dynamic_class_locator(locator: str) -> bool:
-    lowered = locator.lower()
-    patterns = (
-        r"\.[a-f0-9]{8,}",
-        r"\.css-[a-z0-9_-]{4,}",
-        r"\.jss\d+",
-        r"\.sc-[a-z0-9]+",
-    )
-    return any(re.search(pattern, lowered) for pattern in patterns)
+    return _DYNAMIC_CLASS_LOCATOR_RE.search(locator.lower()) is not None
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from math import log2
 from typing import Mapping
 
@@ -44,11 +45,26 @@ _DYNAMIC_CLASS_PATTERNS = (
     re.compile(r"^[a-f0-9]{8,}$", re.IGNORECASE),
     re.compile(r"^[a-z]+__[a-z]+___[a-z0-9]{5,}$", re.IGNORECASE),
 )
-
-_FORBIDDEN_LOCATOR_PATTERNS = (
-    re.compile(r"^/html(/|$)", re.IGNORECASE),
-    re.compile(r"^/body(/|$)", re.IGNORECASE),
+_DYNAMIC_CLASS_RE = re.compile(
+    "|".join(f"(?:{pattern.pattern})" for pattern in _DYNAMIC_CLASS_PATTERNS),
+    re.IGNORECASE,
 )
+# Every dynamic class pattern needs 4+ chars and either one of these leading chars or a "___" run.
+_DYNAMIC_CLASS_MIN_LENGTH = 4
+_DYNAMIC_CLASS_LEAD_CHARS = frozenset("0123456789abcdefABCDEFjJsS")
+
+# Both roots are five characters long; a match must end there or continue with "/".
+_ABSOLUTE_XPATH_ROOTS = ("/html", "/body")
+
+_HEX_VALUE_RE = re.compile(r"[a-f0-9]{8,}", re.IGNORECASE)
+_HEX_RUN_RE = re.compile(r"[a-f0-9]{10,}", re.IGNORECASE)
+_UUID_RE = re.compile(r"[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", re.IGNORECASE)
+_NUMERIC_DRIFT_SUFFIX_RE = re.compile(r"[_:-]\d{3,}$")
+_NUMERIC_ONLY_RE = re.compile(r"\d+")
+_ROOT_CONTAINER_ID_RE = re.compile(r"(^|[\s>+~])#(?:__next|root|app|__nuxt|gatsby-focus-wrapper)(?=$|[\s>+~\[:.#])")
+_JSF_GENERATED_ID_RE = re.compile(r"(:\d+:|:j_idt\d+|:jdt_\d+)", re.IGNORECASE)
+_XPATH_INDEX_RE = re.compile(r"\[\d+\]")
+_CSS_CLASS_TOKEN_RE = re.compile(r"\.([A-Za-z0-9_-]+)")
 
 
 @dataclass(frozen=True, slots=True)
@@ -68,7 +84,7 @@ class AttributeStability:
 def normalize_space(value: str | None, limit: int = 200) -> str:
     if not value:
         return ""
-    compact = re.sub(r"\s+", " ", str(value)).strip()
+    compact = " ".join(str(value).split())
     return compact[:limit] if compact else ""
 
 
@@ -107,11 +123,11 @@ def has_hash_like_pattern(value: str) -> bool:
     text = value.strip()
     if not text:
         return False
-    if re.fullmatch(r"[a-f0-9]{8,}", text, flags=re.IGNORECASE):
+    if _HEX_VALUE_RE.fullmatch(text):
         return True
-    if re.search(r"[a-f0-9]{10,}", text, flags=re.IGNORECASE):
+    if _HEX_RUN_RE.search(text):
         return True
-    if re.fullmatch(r"[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}", text, flags=re.IGNORECASE):
+    if _UUID_RE.fullmatch(text):
         return True
     return False
 
@@ -135,6 +151,7 @@ def extract_stable_prefix(value: str) -> str | None:
     return None
 
 
+@lru_cache(maxsize=4096)
 def analyze_attribute_stability(attr: str, value: str) -> AttributeStability:
     attribute = normalize_space(attr, limit=60).lower()
     normalized = normalize_space(value, limit=200)
@@ -190,13 +207,13 @@ def analyze_attribute_stability(attr: str, value: str) -> AttributeStability:
         score -= 35
         reasons.append("hash-like")
 
-    if re.search(r"[_:-]\d{3,}$", normalized):
+    if _NUMERIC_DRIFT_SUFFIX_RE.search(normalized):
         score -= 24
         reasons.append("numeric-drift-suffix")
     if any(pattern.match(normalized) for pattern in _DYNAMIC_VALUE_PATTERNS):
         score -= 28
         reasons.append("dynamic-pattern")
-    if re.fullmatch(r"\d+", normalized):
+    if _NUMERIC_ONLY_RE.fullmatch(normalized):
         score -= 65
         reasons.append("numeric-only")
 
@@ -260,22 +277,25 @@ def is_obvious_root_container_locator(locator: str) -> bool:
         if f"@id='{root_id}'" in value or f'@id="{root_id}"' in value:
             return True
 
-    if re.search(r"(^|[\s>+~])#(?:__next|root|app|__nuxt|gatsby-focus-wrapper)(?=$|[\s>+~\[:.#])", value):
+    if _ROOT_CONTAINER_ID_RE.search(value):
         return True
     return False
 
 
+@lru_cache(maxsize=4096)
 def is_dynamic_class_token(token: str) -> bool:
     value = token.strip()
     if not value:
         return True
-    if any(pattern.match(value) for pattern in _DYNAMIC_CLASS_PATTERNS):
-        return True
-    if len(value) > 18 and re.search(r"\d", value):
+    if (
+        len(value) >= _DYNAMIC_CLASS_MIN_LENGTH
+        and (value[0] in _DYNAMIC_CLASS_LEAD_CHARS or "___" in value)
+        and _DYNAMIC_CLASS_RE.match(value)
+    ):
         return True
-    if value.count("-") >= 3 and re.search(r"\d", value):
-        return True
-    return False
+    if len(value) <= 18 and value.count("-") < 3:
+        return False
+    return any(map(str.isdecimal, value))
 
 
 def is_dynamic_attribute_value(value: str) -> bool:
@@ -290,7 +310,7 @@ def is_dynamic_id_value(id_value: str) -> bool:
     if is_blocked_root_id(value):
         return True
     # JSF / PrimeFaces / generated ids
-    if ":" in value and re.search(r"(:\d+:|:j_idt\d+|:jdt_\d+)", value, flags=re.IGNORECASE):
+    if ":" in value and _JSF_GENERATED_ID_RE.search(value):
         return True
     return analyze_attribute_stability("id", value).dynamic
 
@@ -315,14 +335,14 @@ def preferred_test_attributes(attributes: Mapping[str, str]) -> list[tuple[str,
 
 def is_absolute_xpath(locator: str) -> bool:
     lowered = locator.strip().lower()
-    return any(pattern.match(lowered) for pattern in _FORBIDDEN_LOCATOR_PATTERNS)
+    return lowered.startswith(_ABSOLUTE_XPATH_ROOTS) and lowered[5:6] in ("", "/")
 
 
 def is_index_based_xpath(locator: str) -> bool:
     lowered = locator.strip().lower()
     if "nth-of-type" in lowered:
         return True
-    return bool(re.search(r"\[\d+\]", lowered))
+    return "[" in lowered and _XPATH_INDEX_RE.search(lowered) is not None
 
 
 def is_forbidden_locator(locator: str, locator_type: str) -> bool:
@@ -343,7 +363,7 @@ def is_forbidden_locator(locator: str, locator_type: str) -> bool:
 
     if locator_type in {"CSS", "Selenium"}:
         # reject generated hash-like classes in selector body
-        for token in re.findall(r"\.([A-Za-z0-9_-]+)", text):
+        for token in _CSS_CLASS_TOKEN_RE.findall(text):
             if is_dynamic_class_token(token):
                 return True
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 import re
-from typing import TYPE_CHECKING, Any, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Sequence
 
 from .action_catalog import action_parameter_keys, has_table_actions, required_parameter_keys
 from .selector_rules import (
@@ -14,6 +14,45 @@ from .selector_rules import (
 if TYPE_CHECKING:
     from playwright.sync_api import Page
 
+_XPATH_COUNT_SCRIPT = """
+(xpath) => document.evaluate(
+  xpath,
+  document,
+  null,
+  XPathResult.ORDERED_NODE_SNAPSHOT_TYPE,
+  null
+).snapshotLength
+"""
+
+# Batched CSS counts use document.querySelectorAll, which only agrees with Playwright's CSS
+# engine when no element hosts a shadow root. Otherwise, and for selectors the DOM rejects,
+# the script returns null and the entry is recounted through page.locator().
+_BATCH_COUNT_SCRIPT = """
+(selectors) => {
+  const hasCss = selectors.some((entry) => entry.kind === 'css');
+  const hasShadowHost = hasCss && Array.prototype.some.call(
+    document.querySelectorAll('*'),
+    (node) => node.shadowRoot !== null
+  );
+  return selectors.map((entry) => {
+    try {
+      if (entry.kind === 'css') {
+        return hasShadowHost ? null : document.querySelectorAll(entry.value).length;
+      }
+      return document.evaluate(
+        entry.value,
+        document,
+        null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE,
+        null
+      ).snapshotLength;
+    } catch (_) {
+      return null;
+    }
+  });
+}
+"""
+
 
 @dataclass(frozen=True, slots=True)
 class GenerationValidation:
@@ -87,6 +126,8 @@ def count_locator_matches(
     locator_type: str,
     locator: str,
     metadata: Mapping[str, Any] | None = None,
+    *,
+    cache: dict[tuple[str, str], int] | None = None,
 ) -> int:
     normalized_type = str(locator_type or "").strip()
     text = str(locator or "").strip()
@@ -96,48 +137,104 @@ def count_locator_matches(
         return 0
 
     try:
-        if normalized_type == "CSS":
-            return len(page.query_selector_all(text))
-
-        if normalized_type == "XPath":
-            return page.locator(f"xpath={text}").count()
-
         if normalized_type == "Playwright":
             return _count_playwright_locator(page, meta)
 
-        if normalized_type == "Selenium":
-            selector_kind = str(meta.get("selector_kind") or "").strip().lower()
-            selector_value = str(meta.get("selector_value") or "").strip()
-            if selector_kind and selector_value:
-                if selector_kind == "css":
-                    return len(page.query_selector_all(selector_value))
-                if selector_kind == "xpath":
-                    return page.locator(f"xpath={selector_value}").count()
-                if selector_kind == "id":
-                    escaped = selector_value.replace("\\", "\\\\").replace('"', '\\"')
-                    return len(page.query_selector_all(f'[id="{escaped}"]'))
-                if selector_kind == "name":
-                    escaped = selector_value.replace("\\", "\\\\").replace('"', '\\"')
-                    return len(page.query_selector_all(f'[name="{escaped}"]'))
-
-            parsed = _parse_selenium_locator(text)
-            if not parsed:
-                return 0
-            parsed_kind, parsed_value = parsed
-            if parsed_kind == "css":
-                return len(page.query_selector_all(parsed_value))
-            if parsed_kind == "xpath":
-                return page.locator(f"xpath={parsed_value}").count()
-            if parsed_kind == "id":
-                escaped = parsed_value.replace("\\", "\\\\").replace('"', '\\"')
-                return len(page.query_selector_all(f'[id="{escaped}"]'))
-            if parsed_kind == "name":
-                escaped = parsed_value.replace("\\", "\\\\").replace('"', '\\"')
-                return len(page.query_selector_all(f'[name="{escaped}"]'))
+        resolved = _resolve_dom_selector(normalized_type, text, meta)
+        if not resolved:
+            return 0
+        if cache is not None and resolved in cache:
+            return cache[resolved]
+        kind, selector = resolved
+        if kind == "css":
+            count = page.locator(selector).count()
+        else:
+            count = max(0, int(page.evaluate(_XPATH_COUNT_SCRIPT, selector) or 0))
     except Exception:
         return 0
 
-    return 0
+    if cache is not None:
+        cache[resolved] = count
+    return count
+
+
+def count_locator_matches_batch(
+    page: Page,
+    entries: Sequence[tuple[str, str, Mapping[str, Any] | None]],
+    *,
+    cache: dict[tuple[str, str], int] | None = None,
+) -> list[int]:
+    counts = [0] * len(entries)
+    pending: dict[tuple[str, str], list[int]] = {}
+
+    for index, (locator_type, locator, metadata) in enumerate(entries):
+        normalized_type = str(locator_type or "").strip()
+        text = str(locator or "").strip()
+        if not normalized_type or not text:
+            continue
+        if normalized_type == "Playwright":
+            counts[index] = count_locator_matches(page, normalized_type, text, metadata)
+            continue
+        resolved = _resolve_dom_selector(normalized_type, text, metadata or {})
+        if not resolved:
+            continue
+        if cache is not None and resolved in cache:
+            counts[index] = cache[resolved]
+            continue
+        pending.setdefault(resolved, []).append(index)
+
+    if not pending:
+        return counts
+
+    selectors = [{"kind": kind, "value": selector} for kind, selector in pending]
+    try:
+        payload = page.evaluate(_BATCH_COUNT_SCRIPT, selectors)
+    except Exception:
+        payload = None
+
+    if not isinstance(payload, list) or len(payload) != len(selectors):
+        payload = [None] * len(selectors)
+
+    for (key, indexes), value in zip(pending.items(), payload):
+        if value is None:
+            count = count_locator_matches(page, *entries[indexes[0]], cache=cache)
+        else:
+            count = max(0, int(value))
+            if cache is not None:
+                cache[key] = count
+        for index in indexes:
+            counts[index] = count
+    return counts
+
+
+def _resolve_dom_selector(locator_type: str, locator: str, metadata: Mapping[str, Any]) -> tuple[str, str] | None:
+    if locator_type == "CSS":
+        return "css", locator
+    if locator_type == "XPath":
+        return "xpath", locator
+    if locator_type != "Selenium":
+        return None
+
+    selector_kind = str(metadata.get("selector_kind") or "").strip().lower()
+    selector_value = str(metadata.get("selector_value") or "").strip()
+    if selector_kind and selector_value:
+        resolved = _selenium_dom_selector(selector_kind, selector_value)
+        if resolved:
+            return resolved
+
+    parsed = _parse_selenium_locator(locator)
+    if not parsed:
+        return None
+    return _selenium_dom_selector(*parsed)
+
+
+def _selenium_dom_selector(kind: str, value: str) -> tuple[str, str] | None:
+    if kind in {"css", "xpath"}:
+        return kind, value
+    if kind in {"id", "name"}:
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return "css", f'[{kind}="{escaped}"]'
+    return None
 
 
 def validate_locator_candidate(
@@ -145,9 +242,12 @@ def validate_locator_candidate(
     locator_type: str,
     locator: str,
     metadata: Mapping[str, Any] | None = None,
+    *,
+    match_count: int | None = None,
 ) -> LocatorValidation:
     meta = dict(metadata or {})
-    match_count = count_locator_matches(page, locator_type, locator, meta)
+    if match_count is None:
+        match_count = count_locator_matches(page, locator_type, locator, meta)
     stable = not is_forbidden_locator(locator, locator_type)
 
     source_attr = str(meta.get("source_attr") or "").strip().lower()
@@ -196,26 +296,44 @@ def _parse_selenium_locator(locator: str) -> tuple[str, str] | None:
     return None
 
 
+def _count_by_test_id(page: Page, metadata: Mapping[str, Any]) -> int:
+    return page.get_by_test_id(str(metadata.get("value") or "")).count()
+
+
+def _count_by_label(page: Page, metadata: Mapping[str, Any]) -> int:
+    return page.get_by_label(str(metadata.get("value") or ""), exact=True).count()
+
+
+def _count_by_placeholder(page: Page, metadata: Mapping[str, Any]) -> int:
+    return page.get_by_placeholder(str(metadata.get("value") or ""), exact=True).count()
+
+
+def _count_by_role_name(page: Page, metadata: Mapping[str, Any]) -> int:
+    return page.get_by_role(
+        str(metadata.get("role") or ""),
+        name=str(metadata.get("name") or ""),
+        exact=True,
+    ).count()
+
+
+def _count_by_locator_has_text(page: Page, metadata: Mapping[str, Any]) -> int:
+    return page.locator(
+        str(metadata.get("tag") or "*"),
+        has_text=str(metadata.get("text") or ""),
+    ).count()
+
+
+_PLAYWRIGHT_COUNTERS: dict[str, Callable[[Page, Mapping[str, Any]], int]] = {
+    "test_id": _count_by_test_id,
+    "label": _count_by_label,
+    "placeholder": _count_by_placeholder,
+    "role_name": _count_by_role_name,
+    "locator_has_text": _count_by_locator_has_text,
+}
+
+
 def _count_playwright_locator(page: Page, metadata: Mapping[str, Any]) -> int:
-    kind = str(metadata.get("playwright_kind") or "").strip()
-    if not kind:
+    counter = _PLAYWRIGHT_COUNTERS.get(str(metadata.get("playwright_kind") or "").strip())
+    if counter is None:
         return 0
-
-    if kind == "test_id":
-        return page.get_by_test_id(str(metadata.get("value") or "")).count()
-    if kind == "label":
-        return page.get_by_label(str(metadata.get("value") or ""), exact=True).count()
-    if kind == "placeholder":
-        return page.get_by_placeholder(str(metadata.get("value") or ""), exact=True).count()
-    if kind == "role_name":
-        return page.get_by_role(
-            str(metadata.get("role") or ""),
-            name=str(metadata.get("name") or ""),
-            exact=True,
-        ).count()
-    if kind == "locator_has_text":
-        return page.locator(
-            str(metadata.get("tag") or "*"),
-            has_text=str(metadata.get("text") or ""),
-        ).count()
-    return 0
+    return counter(page, metadata)
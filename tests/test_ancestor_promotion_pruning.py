@@ -1,37 +1,31 @@
 from inspectelement.locator_generator import (
-    _build_promoted_clickable_ancestor_drafts,
+    CandidateDraft,
+    _build_promoted_drafts_from_snapshot,
     _build_stable_attr_drafts,
-    _prune_descendant_css_locator,
+    _prune_descendant_css_drafts,
+    extract_css_parent_if_descendant,
 )
 
 
 class FakePage:
     def __init__(self, counts: dict[str, int]) -> None:
         self.counts = counts
+        self.evaluate_calls = 0
 
-    def query_selector_all(self, selector: str) -> list[object]:
-        return [object()] * int(self.counts.get(selector, 0))
-
-
-class FakeElement:
-    def __init__(self, snapshot: dict) -> None:
-        self.snapshot = snapshot
-
-    def evaluate(self, _script: str) -> dict:
-        return self.snapshot
+    def evaluate(self, _script: str, selectors: list[dict[str, str]]) -> list[int]:
+        self.evaluate_calls += 1
+        return [int(self.counts.get(entry["value"], 0)) for entry in selectors]
 
 
 def test_promote_clickable_ancestor_prefers_anchor_stable_locator() -> None:
-    element = FakeElement(
-        {
-            "tag": "a",
-            "role": "link",
-            "attrs": {"data-testid": "scheduleBoxHotel"},
-        }
-    )
+    snapshot = {
+        "tag": "a",
+        "role": "link",
+        "attrs": {"data-testid": "scheduleBoxHotel"},
+    }
     page = FakePage({'[data-testid="scheduleBoxHotel"]': 1})
 
-    drafts = _build_promoted_clickable_ancestor_drafts(page, element)
+    drafts = _build_promoted_drafts_from_snapshot(page, snapshot)
 
     assert drafts is not None
     css_locators = [draft.locator for draft in drafts if draft.locator_type == "CSS"]
@@ -39,31 +33,80 @@ def test_promote_clickable_ancestor_prefers_anchor_stable_locator() -> None:
     assert all(" div" not in locator for locator in css_locators)
 
 
+def test_promote_clickable_ancestor_counts_all_attrs_in_one_call() -> None:
+    snapshot = {
+        "tag": "button",
+        "role": "",
+        "attrs": {"data-testid": "save", "name": "saveButton"},
+    }
+    page = FakePage({'[data-testid="save"]': 2, 'button[name="saveButton"]': 1})
+
+    drafts = _build_promoted_drafts_from_snapshot(page, snapshot)
+
+    assert drafts is not None
+    assert [draft.locator for draft in drafts] == ['By.name("saveButton")']
+    assert page.evaluate_calls == 1
+
+
 def test_prune_descendant_when_parent_is_unique() -> None:
     page = FakePage({'a[data-testid="scheduleBoxHotel"]': 1})
     locator = 'a[data-testid="scheduleBoxHotel"] div'
 
-    pruned = _prune_descendant_css_locator(page, locator)
+    pruned = _prune_descendant_css_drafts(page, [CandidateDraft("CSS", locator, "meaningful_class")])
 
-    assert pruned == 'a[data-testid="scheduleBoxHotel"]'
+    assert [draft.locator for draft in pruned] == ['a[data-testid="scheduleBoxHotel"]']
 
 
 def test_keep_descendant_when_parent_is_not_unique() -> None:
     page = FakePage({'a[data-testid="scheduleBoxHotel"]': 2})
     locator = 'a[data-testid="scheduleBoxHotel"] div'
 
-    pruned = _prune_descendant_css_locator(page, locator)
+    pruned = _prune_descendant_css_drafts(page, [CandidateDraft("CSS", locator, "meaningful_class")])
+
+    assert [draft.locator for draft in pruned] == [locator]
+
+
+def test_prune_descendant_reuses_cached_parent_count() -> None:
+    page = FakePage({})
+    cache = {("css", 'a[data-testid="scheduleBoxHotel"]'): 1}
+
+    drafts = [CandidateDraft("CSS", 'a[data-testid="scheduleBoxHotel"] div', "meaningful_class")]
+
+    pruned = _prune_descendant_css_drafts(page, drafts, cache)
+
+    assert [draft.locator for draft in pruned] == ['a[data-testid="scheduleBoxHotel"]']
+    assert page.evaluate_calls == 0
+
+
+def test_prune_descendant_drafts_in_one_batch_and_dedupe() -> None:
+    page = FakePage({'a[data-testid="scheduleBoxHotel"]': 1, "form.login": 3})
+    drafts = [
+        CandidateDraft("CSS", 'a[data-testid="scheduleBoxHotel"] div', "meaningful_class"),
+        CandidateDraft("CSS", 'a[data-testid="scheduleBoxHotel"]', "stable_attr:data-testid"),
+        CandidateDraft("CSS", "form.login input", "meaningful_class"),
+    ]
+
+    pruned = _prune_descendant_css_drafts(page, drafts)
+
+    assert [draft.locator for draft in pruned] == ['a[data-testid="scheduleBoxHotel"]', "form.login input"]
+    assert pruned[0].metadata["descendant_pruned"] is True
+    assert drafts[0].locator == 'a[data-testid="scheduleBoxHotel"] div'
+    assert "descendant_pruned" not in drafts[0].metadata
+
 
-    assert pruned == locator
+def test_extract_css_parent_uses_last_descendant_split() -> None:
+    assert extract_css_parent_if_descendant('form[name="a b"] div > span label') == 'form[name="a b"] div > span'
+    assert extract_css_parent_if_descendant("ul > li") is None
+    assert extract_css_parent_if_descendant('[title="dir\\\\"] span') == '[title="dir\\\\"]'
 
 
 def test_do_not_prune_to_blocklisted_root_parent_id() -> None:
     page = FakePage({"#__next": 1})
     locator = '#__next button[data-value="manageBooking"]'
 
-    pruned = _prune_descendant_css_locator(page, locator)
+    pruned = _prune_descendant_css_drafts(page, [CandidateDraft("CSS", locator, "meaningful_class")])
 
-    assert pruned == locator
+    assert [draft.locator for draft in pruned] == [locator]
 
 
 def test_blocklisted_root_id_does_not_generate_stable_attr_id_candidate() -> None:
@@ -73,17 +116,15 @@ def test_blocklisted_root_id_does_not_generate_stable_attr_id_candidate() -> Non
 
 
 def test_promote_child_inside_button_to_button_id() -> None:
-    element = FakeElement(
-        {
-            "tag": "button",
-            "role": "",
-            "inputType": "",
-            "attrs": {"id": "bookNowBtn"},
-        }
-    )
+    snapshot = {
+        "tag": "button",
+        "role": "",
+        "inputType": "",
+        "attrs": {"id": "bookNowBtn"},
+    }
     page = FakePage({"#bookNowBtn": 1})
 
-    drafts = _build_promoted_clickable_ancestor_drafts(page, element)
+    drafts = _build_promoted_drafts_from_snapshot(page, snapshot)
 
     assert drafts is not None
     selenium_locators = [draft.locator for draft in drafts if draft.locator_type == "Selenium"]
@@ -91,16 +132,14 @@ def test_promote_child_inside_button_to_button_id() -> None:
 
 
 def test_do_not_promote_blocklisted_root_id() -> None:
-    element = FakeElement(
-        {
-            "tag": "button",
-            "role": "button",
-            "inputType": "",
-            "attrs": {"id": "__next"},
-        }
-    )
+    snapshot = {
+        "tag": "button",
+        "role": "button",
+        "inputType": "",
+        "attrs": {"id": "__next"},
+    }
     page = FakePage({"#__next": 1})
 
-    drafts = _build_promoted_clickable_ancestor_drafts(page, element)
+    drafts = _build_promoted_drafts_from_snapshot(page, snapshot)
 
     assert drafts is None
@@ -1,4 +1,4 @@
-from inspectelement.locator_generator import is_dynamic_class, normalize_classes
+from inspectelement.locator_generator import _escape_css_identifier, is_dynamic_class, normalize_classes
 
 
 def test_normalize_classes_deduplicates_and_trims() -> None:
@@ -6,6 +6,11 @@ def test_normalize_classes_deduplicates_and_trims() -> None:
     assert normalize_classes("btn btn  btn-primary") == ["btn", "btn-primary"]
 
 
+def test_normalize_classes_skips_non_string_entries() -> None:
+    assert normalize_classes(["btn", None, 3, " btn-primary "]) == ["btn", "btn-primary"]
+    assert normalize_classes(iter([b"btn", " card ", None, "card"])) == ["card"]
+
+
 def test_dynamic_class_detection() -> None:
     assert is_dynamic_class("css-12ab9c")
     assert is_dynamic_class("jss123")
@@ -14,3 +19,11 @@ def test_dynamic_class_detection() -> None:
 
     assert not is_dynamic_class("btn-primary")
     assert not is_dynamic_class("card")
+    assert is_dynamic_class("feature-card-variant-7")
+    assert not is_dynamic_class("feature-card-variant-\u00b2")
+
+
+def test_escape_css_identifier_keeps_safe_names_and_escapes_others() -> None:
+    assert _escape_css_identifier("btn-primary_lg") == "btn-primary_lg"
+    assert _escape_css_identifier("col:6 md") == "col\\3a 6\\20 md"
+    assert _escape_css_identifier("") == ""
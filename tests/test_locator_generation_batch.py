@@ -0,0 +1,94 @@
+from inspectelement.locator_generator import (
+    _CACHED_ELEMENT_CONTEXT_SCRIPT,
+    _ELEMENT_CONTEXT_VERSION,
+    CandidateDraft,
+    _element_context,
+    _validate_drafts,
+    generate_locator_candidates,
+)
+from inspectelement.models import ElementSummary
+
+
+class FakeElement:
+    def evaluate(self, _script: str) -> None:
+        return None
+
+
+class FakeBatchPage:
+    def __init__(self, counts: dict[str, int]) -> None:
+        self.counts = counts
+        self.count_batches: list[list[str]] = []
+
+    def evaluate(self, _script: str, arg: list | str | None = None):
+        if arg is None:
+            return {"node_count": 200, "text_node_count": 50}
+        if isinstance(arg, str):
+            return self.counts.get(arg, 0)
+        self.count_batches.append([entry["value"] for entry in arg])
+        return [self.counts.get(entry["value"], 0) for entry in arg]
+
+
+def _summary(element_id: str, text: str) -> ElementSummary:
+    return ElementSummary(
+        tag="button",
+        id=element_id,
+        classes=[],
+        name=None,
+        role="button",
+        text=text,
+        placeholder=None,
+        aria_label=None,
+        label_text=None,
+        attributes={"id": element_id},
+    )
+
+
+def test_generation_counts_all_drafts_in_one_round_trip() -> None:
+    page = FakeBatchPage({'[id="saveBtn"]': 1, "//button[normalize-space()='Kaydet']": 1})
+
+    candidates = generate_locator_candidates(page, FakeElement(), _summary("saveBtn", "Kaydet"))
+
+    assert len(page.count_batches) == 1
+    assert candidates[0].locator == 'By.id("saveBtn")'
+
+
+def test_validation_leaves_draft_metadata_untouched() -> None:
+    page = FakeBatchPage({'[id="saveBtn"]': 1})
+    draft = CandidateDraft("CSS", '[id="saveBtn"]', "stable_attr:id", {"strategy_type": "id"})
+
+    candidates = _validate_drafts(page, [draft], {"node_count": 200, "text_node_count": 50})
+
+    assert candidates[0].metadata["uniqueness_verified"] is True
+    assert draft.metadata == {"strategy_type": "id"}
+
+
+class InstallingElement:
+    def __init__(self, cached: object = None) -> None:
+        self.cached = cached
+        self.scripts: list[str] = []
+
+    def evaluate(self, script: str) -> object:
+        self.scripts.append(script)
+        if "__inspectelementElementContext = Object.assign" not in script:
+            return self.cached
+        return {"ancestor": None, "fallback": "div > span", "clickable": None}
+
+
+def test_element_context_installs_helper_when_missing() -> None:
+    element = InstallingElement()
+
+    context = _element_context(element)
+
+    assert context["fallback"] == "div > span"
+    assert len(element.scripts) == 2
+    assert len(element.scripts[0]) < len(element.scripts[1])
+
+
+def test_element_context_reinstalls_helper_replaced_by_the_page() -> None:
+    element = InstallingElement(cached={"fallback": "spoofed"})
+
+    context = _element_context(element)
+
+    assert context["fallback"] == "div > span"
+    assert len(element.scripts) == 2
+    assert f".version === '{_ELEMENT_CONTEXT_VERSION}'" in _CACHED_ELEMENT_CONTEXT_SCRIPT
@@ -53,3 +53,15 @@ def test_recommendation_prefers_selenium_by_id_when_id_exists() -> None:
 
     ordered = recommend_locator_candidates(candidates)
     assert ordered[0].locator == 'By.id("loginButton")'
+
+
+def test_dynamic_id_penalty_matches_generated_id_shapes() -> None:
+    dynamic = ['[id="user_198273645"]', "#a1b2c3d4e5f6a7b8c9", '[id="98765"]', "#ab12345"]
+    stable = ["#saveButton", 'input[name="email"]', 'button[data-testid="save"]']
+
+    for locator in dynamic:
+        _score, reasons, _risky = score_locator_for_write(_candidate("CSS", locator))
+        assert "penalty:dynamic-id" in reasons, locator
+    for locator in stable:
+        _score, reasons, _risky = score_locator_for_write(_candidate("CSS", locator))
+        assert "penalty:dynamic-id" not in reasons, locator
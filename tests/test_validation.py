@@ -1,4 +1,20 @@
-from inspectelement.validation import validate_generation_request
+import pytest
+
+from inspectelement.validation import (
+    count_locator_matches,
+    count_locator_matches_batch,
+    validate_generation_request,
+)
+
+
+class FakeBatchPage:
+    def __init__(self, counts: dict[str, int]) -> None:
+        self.counts = counts
+        self.evaluate_calls = 0
+
+    def evaluate(self, _script: str, selectors: list[dict[str, str]]) -> list[int]:
+        self.evaluate_calls += 1
+        return [self.counts.get(entry["value"], 0) for entry in selectors]
 
 
 def test_validate_blocks_when_required_context_missing() -> None:
@@ -104,3 +120,161 @@ def test_validate_success_for_valid_payload() -> None:
     )
     assert result.ok
     assert result.message == "Validation successful."
+
+
+def test_count_locator_matches_batch_uses_single_round_trip() -> None:
+    page = FakeBatchPage({"#save": 1, "//button[normalize-space()='Kaydet']": 2, '[id="saveBtn"]': 1})
+
+    counts = count_locator_matches_batch(
+        page,
+        [
+            ("CSS", "#save", None),
+            ("XPath", "//button[normalize-space()='Kaydet']", None),
+            ("Selenium", 'By.id("saveBtn")', {"selector_kind": "id", "selector_value": "saveBtn"}),
+            ("CSS", "", None),
+        ],
+    )
+
+    assert counts == [1, 2, 1, 0]
+    assert page.evaluate_calls == 1
+
+
+def test_count_locator_matches_batch_reuses_cached_counts() -> None:
+    page = FakeBatchPage({"#save": 1, "#cancel": 2})
+    cache = {("css", "#save"): 1}
+
+    counts = count_locator_matches_batch(page, [("CSS", "#save", None), ("CSS", "#cancel", None)], cache=cache)
+    again = count_locator_matches_batch(page, [("CSS", "#cancel", None)], cache=cache)
+
+    assert counts == [1, 2]
+    assert again == [2]
+    assert page.evaluate_calls == 1
+
+
+class FakeLocator:
+    def __init__(self, page: "FakeShadowPage", selector: str) -> None:
+        self.page = page
+        self.selector = selector
+
+    def count(self) -> int:
+        self.page.locator_counts.append(self.selector)
+        if self.selector not in self.page.engine_counts:
+            raise ValueError(f"Unexpected token in {self.selector}")
+        return self.page.engine_counts[self.selector]
+
+
+class FakeShadowPage:
+    def __init__(
+        self,
+        dom_counts: dict[str, int],
+        engine_counts: dict[str, int],
+        *,
+        shadow_hosts: bool = False,
+        invalid: frozenset[str] = frozenset(),
+    ) -> None:
+        self.dom_counts = dom_counts
+        self.engine_counts = engine_counts
+        self.shadow_hosts = shadow_hosts
+        self.invalid = invalid
+        self.batches: list[list[str]] = []
+        self.locator_counts: list[str] = []
+
+    def evaluate(self, _script: str, selectors: list[dict[str, str]]) -> list[int | None]:
+        self.batches.append([entry["value"] for entry in selectors])
+        results: list[int | None] = []
+        for entry in selectors:
+            if entry["value"] in self.invalid or (entry["kind"] == "css" and self.shadow_hosts):
+                results.append(None)
+            else:
+                results.append(self.dom_counts.get(entry["value"], 0))
+        return results
+
+    def locator(self, selector: str) -> FakeLocator:
+        return FakeLocator(self, selector)
+
+
+def test_single_and_batch_css_counts_agree_and_dedupe_selectors() -> None:
+    page = FakeShadowPage({"button.save": 2}, {"button.save": 2})
+
+    single = count_locator_matches(page, "CSS", "button.save")
+    batch = count_locator_matches_batch(
+        page,
+        [
+            ("CSS", "button.save", None),
+            ("Selenium", 'By.cssSelector("button.save")', None),
+            ("CSS", "button.save", None),
+        ],
+    )
+
+    assert single == 2
+    assert batch == [2, 2, 2]
+    assert page.batches == [["button.save"]]
+
+
+def test_batch_recounts_rejected_css_through_playwright_and_bad_selectors_count_zero() -> None:
+    page = FakeShadowPage(
+        {"#save": 1},
+        {"#save": 1, 'button:has-text("Kaydet")': 1},
+        invalid=frozenset({'button:has-text("Kaydet")', "button[", "//button["}),
+    )
+
+    counts = count_locator_matches_batch(
+        page,
+        [
+            ("CSS", "#save", None),
+            ("CSS", 'button:has-text("Kaydet")', None),
+            ("CSS", "button[", None),
+            ("XPath", "//button[", None),
+        ],
+    )
+
+    assert counts == [1, 1, 0, 0]
+    assert page.locator_counts == ['button:has-text("Kaydet")', "button["]
+    assert count_locator_matches(page, "CSS", "button[") == 0
+
+
+def test_batch_counts_css_with_playwright_when_page_has_shadow_hosts() -> None:
+    page = FakeShadowPage(
+        {"my-host .btn": 0, "//my-host": 1},
+        {"my-host .btn": 1},
+        shadow_hosts=True,
+    )
+    cache: dict[tuple[str, str], int] = {}
+
+    counts = count_locator_matches_batch(
+        page,
+        [("CSS", "my-host .btn", None), ("XPath", "//my-host", None), ("CSS", "my-host .btn", None)],
+        cache=cache,
+    )
+
+    assert counts == [1, 1, 1]
+    assert page.locator_counts == ["my-host .btn"]
+    assert cache == {("css", "my-host .btn"): 1, ("xpath", "//my-host"): 1}
+    assert count_locator_matches(page, "CSS", "my-host .btn", cache=cache) == 1
+    assert page.locator_counts == ["my-host .btn"]
+
+
+def test_css_counts_cross_open_shadow_boundaries_in_chromium() -> None:
+    sync_api = pytest.importorskip("playwright.sync_api")
+    with sync_api.sync_playwright() as playwright:
+        try:
+            browser = playwright.chromium.launch()
+        except Exception:
+            pytest.skip("Chromium is not installed for Playwright.")
+        try:
+            page = browser.new_page()
+            page.set_content(
+                "<my-host></my-host>"
+                "<script>"
+                "document.querySelector('my-host').attachShadow({mode: 'open'}).innerHTML ="
+                " '<button class=\"btn\">Kaydet</button>';"
+                "</script>"
+            )
+
+            assert count_locator_matches(page, "CSS", "my-host .btn") == 1
+            assert count_locator_matches_batch(
+                page,
+                [("CSS", "my-host .btn", None), ("CSS", "button.btn", None), ("XPath", "//my-host", None)],
+            ) == [1, 1, 1]
+        finally:
+            browser.close()